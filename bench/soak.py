@@ -0,0 +1,391 @@
+# bench/soak.py
+"""
+accelerated soak test: run the status/switch paths against emulated supplies
+for many cycles and fail if memory keeps growing or FS latency drifts.
+
+modes:
+- headless (default): one PowerSupplyCommunicator per emulated device,
+  round-robin query_status() plus a switch command every --switch-every cycles
+- --gui: a real (withdrawn) PowerSupplyGUI on one emulated device. its own
+  auto-query loop and handle_switch/confirm path run through tk, with every
+  after() delay divided by --speedup. needs a display.
+
+every --sample-every cycles the harness records RSS, tracemalloc current size,
+the top allocators, FS latency percentiles for that window and (gui mode) the
+number of pending tk after() callbacks and the log textbox length.
+
+after a --warmup fraction of samples, a least-squares line is fitted to each
+series; the run fails if the fitted growth over the run exceeds the limits.
+latency drift must also stand out from the scatter of the samples around the
+fit, so the noise floor follows whatever the emulated frame time is
+(--line-delay-ms makes frames realistically slow).
+in gui mode the run also fails if frames stop arriving for --stall-timeout-s
+or the gui tries to open a dialog (which would block a withdrawn window).
+results go to --out-dir as json so runs can be compared with --compare.
+
+usage:
+  python bench/soak.py --cycles 2000000 --devices 4
+  python bench/soak.py --gui --cycles 200000 --speedup 1000
+  python bench/soak.py --compare soak_results/a.json soak_results/b.json
+"""
+from __future__ import annotations
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.emulated_device import EmulatedSupply  # noqa: E402
+from src.serial_comm import PowerSupplyCommunicator, command_for  # noqa: E402
+
+def _rss_windows() -> int | None:
+    # GetProcessMemoryInfo via ctypes, so windows doesn't need psutil
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    kernel32 = ctypes.windll.kernel32  # type: ignore[attr-defined]
+    psapi = ctypes.windll.psapi  # type: ignore[attr-defined]
+    psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        return None
+    return counters.WorkingSetSize
+
+def rss_bytes() -> int | None:
+    """
+    resident set size (working set on windows) of this process, or None when it
+    can't be read. a run without rss fails in verdict(), it doesn't pass silently.
+    """
+    try:
+        import psutil  # optional
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    if os.name == "nt":
+        try:
+            return _rss_windows()
+        except (OSError, AttributeError):
+            return None
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def percentile(sorted_vals: list[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    idx = min(len(sorted_vals) - 1, max(0, round(q * (len(sorted_vals) - 1))))
+    return sorted_vals[idx]
+
+def slope(xs: list[float], ys: list[float]) -> float:
+    """
+    least-squares slope of ys over xs (0 when undefined).
+    """
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mx = sum(xs) / n
+    my = sum(ys) / n
+    den = sum((x - mx) ** 2 for x in xs)
+    if den == 0:
+        return 0.0
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / den
+
+class Sampler:
+    def __init__(self, top_n: int) -> None:
+        self.top_n = top_n
+        self.samples: list[dict] = []
+        self.latencies: list[float] = []
+        self._t0 = time.monotonic()
+
+    def sample(self, cycle: int, extra: dict | None = None) -> None:
+        gc.collect()
+        lat = sorted(self.latencies)
+        self.latencies = []
+        current, _peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics("lineno")[: self.top_n]
+        row = {
+            "cycle": cycle,
+            "elapsed_s": time.monotonic() - self._t0,
+            "rss": rss_bytes(),
+            "traced": current,
+            "fs_p50_ms": percentile(lat, 0.50),
+            "fs_p95_ms": percentile(lat, 0.95),
+            "fs_p99_ms": percentile(lat, 0.99),
+            "top": [{"where": str(s.traceback), "size": s.size, "count": s.count} for s in top],
+        }
+        if extra:
+            row.update(extra)
+        self.samples.append(row)
+        rss = "     n/a" if row["rss"] is None else f"{row['rss'] / 1e6:8.1f}"
+        print(f"cycle {cycle:>9d}  rss={rss} MB  "
+              f"traced={current / 1e6:7.2f} MB  fs p50/p95/p99="
+              f"{row['fs_p50_ms']:.3f}/{row['fs_p95_ms']:.3f}/{row['fs_p99_ms']:.3f} ms"
+              + "".join(f"  {k}={v}" for k, v in (extra or {}).items()),
+              flush=True)
+
+def run_headless(args, sampler: Sampler) -> list[str]:
+    psus = []
+    for i in range(args.devices):
+        psu = PowerSupplyCommunicator()
+        psu._ser = EmulatedSupply(port=f"EMU{i}", serial_number=str(1000 + i), seed=i,  # type: ignore[assignment]
+                                  line_delay_s=args.line_delay_ms / 1000)
+        psus.append(psu)
+
+    names = ["fan", "shutter", "lamp"]
+    for cycle in range(1, args.cycles + 1):
+        psu = psus[cycle % len(psus)]
+        t0 = time.perf_counter()
+        psu.query_status()
+        sampler.latencies.append((time.perf_counter() - t0) * 1000)
+        if cycle % args.switch_every == 0:
+            name = names[(cycle // args.switch_every) % len(names)]
+            psu.send_command(command_for(name, bool((cycle // args.switch_every) & 1)), wait_s=0)
+        if cycle % args.sample_every == 0:
+            sampler.sample(cycle)
+    return []
+
+class _DialogRecorder:
+    """
+    stands in for tkinter.messagebox inside src.cgui: a modal dialog on a
+    withdrawn window would block the harness forever, so record it instead.
+    """
+    def __init__(self) -> None:
+        self.shown: list[str] = []
+
+    def _record(self, title, message=None, **_kw):
+        self.shown.append(f"{title}: {message}")
+
+    showerror = showwarning = showinfo = _record
+
+def run_gui(args, sampler: Sampler) -> list[str]:
+    import src.cgui as cgui
+
+    dialogs = _DialogRecorder()
+    cgui.messagebox = dialogs  # type: ignore[assignment]
+
+    app = cgui.PowerSupplyGUI()
+    app.withdraw()
+    app.psu._ser = EmulatedSupply(port="EMU0", seed=0,  # type: ignore[assignment]
+                                  line_delay_s=args.line_delay_ms / 1000)
+
+    # compress every scheduled delay so the polling/confirm timers run back to back
+    real_after = app.after
+    def fast_after(ms, func=None, *a):
+        if func is None:
+            return real_after(ms)
+        return real_after(int(ms / args.speedup), func, *a)
+    app.after = fast_after  # type: ignore[method-assign]
+
+    # time each FS the gui issues, whichever path it comes from
+    real_query = app.psu.query_status
+    def timed_query():
+        t0 = time.perf_counter()
+        try:
+            return real_query()
+        finally:
+            sampler.latencies.append((time.perf_counter() - t0) * 1000)
+    app.psu.query_status = timed_query  # type: ignore[method-assign]
+
+    switches = [("fan", app.fan_var), ("shutter", app.shutter_var), ("lamp", app.lamp_var)]
+    start = app.psu._ser.frames_sent  # type: ignore[union-attr]
+    app.start_auto_query()
+    next_switch = args.switch_every
+    next_sample = args.sample_every
+    failures: list[str] = []
+    last_cycle = -1
+    last_progress = time.monotonic()
+    try:
+        while True:
+            app.update()
+            cycle = app.psu._ser.frames_sent - start  # type: ignore[union-attr]
+            if dialogs.shown:
+                failures.append(f"gui opened a dialog at cycle {cycle}: {dialogs.shown[0]}")
+                break
+            now = time.monotonic()
+            if cycle != last_cycle:
+                last_cycle, last_progress = cycle, now
+            elif now - last_progress > args.stall_timeout_s:
+                failures.append(f"no FS frames for {args.stall_timeout_s:g} s at cycle {cycle} "
+                                f"(auto-query loop stopped?)")
+                break
+            if cycle >= next_switch:
+                name, var = switches[(next_switch // args.switch_every) % len(switches)]
+                var.set(not var.get())  # what a click does before the command fires
+                app.handle_switch(name, var)
+                next_switch += args.switch_every
+            if cycle >= next_sample:
+                sampler.sample(cycle, {
+                    "pending_after": len(app.tk.splitlist(app.tk.call("after", "info"))),
+                    "log_chars": len(app.output.get("1.0", "end")),
+                })
+                next_sample += args.sample_every
+            if cycle >= args.cycles:
+                break
+    finally:
+        app.stop_auto_query()
+        app.destroy()
+    return failures
+
+def verdict(samples: list[dict], args) -> list[str]:
+    """
+    fit trends after warmup and return the list of failures (empty = pass).
+    """
+    usable = samples[int(len(samples) * args.warmup):]
+    if len(usable) < 3:
+        return ["not enough samples after warmup; raise --cycles or lower --sample-every"]
+    xs = [s["cycle"] for s in usable]
+    span = xs[-1] - xs[0]
+    failures = []
+
+    def growth(key: str) -> float | None:
+        ys = [s.get(key) for s in usable]
+        if any(y is None for y in ys):
+            return None
+        return slope(xs, ys) * span
+
+    rss = growth("rss")
+    if rss is None:
+        failures.append("rss unavailable on this platform (install psutil); memory growth not checked")
+    elif rss > args.max_rss_growth_mb * 1e6:
+        failures.append(f"rss grows {rss / 1e6:.1f} MB over the run (limit {args.max_rss_growth_mb} MB)")
+    traced = growth("traced")
+    if traced is not None and traced > args.max_traced_growth_mb * 1e6:
+        failures.append(f"python heap grows {traced / 1e6:.1f} MB over the run "
+                        f"(limit {args.max_traced_growth_mb} MB); top: {usable[-1]['top'][:1]}")
+    pending = growth("pending_after")
+    if pending is not None and pending > args.max_pending_after_growth:
+        failures.append(f"pending tk after() callbacks grow by {pending:.0f} over the run")
+    log_chars = growth("log_chars")
+    if log_chars is not None and log_chars > args.max_log_growth_chars:
+        failures.append(f"log textbox grows by {log_chars:.0f} chars over the run "
+                        f"(limit {args.max_log_growth_chars})")
+    for key in ("fs_p50_ms", "fs_p95_ms"):
+        ys = [s[key] for s in usable]
+        k = slope(xs, ys)
+        mx = sum(xs) / len(xs)
+        my = sum(ys) / len(ys)
+        # fitted value at the first usable sample, so one noisy early window can't set the baseline
+        base = my - k * (mx - xs[0])
+        drift = k * span
+        # scatter of the windows around the fit; it scales with the frame time,
+        # so sub-ms emulated frames and 200 ms real-looking ones get the same treatment
+        resid = [y - (my + k * (x - mx)) for x, y in zip(xs, ys)]
+        noise = (sum(r * r for r in resid) / max(1, len(resid) - 2)) ** 0.5
+        floor = args.latency_noise_sigmas * noise
+        if base > 0 and drift > floor and drift / base > args.max_latency_drift:
+            failures.append(f"{key} drifts +{drift:.3f} ms (+{drift / base:.0%}) over the run "
+                            f"(limit {args.max_latency_drift:.0%}, noise floor {floor:.3f} ms)")
+    return failures
+
+def git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def compare(paths: list[str]) -> None:
+    """
+    print the last sample and verdict of each stored run side by side.
+    """
+    keys = ["rss", "traced", "fs_p50_ms", "fs_p95_ms", "fs_p99_ms", "pending_after", "log_chars"]
+    runs = []
+    for p in paths:
+        with open(p) as fh:
+            runs.append(json.load(fh))
+    print(f"{'':16s}" + "".join(f"{os.path.basename(p)[:22]:>24s}" for p in paths))
+    for label, get in [("rev", lambda r: r["git_rev"]),
+                       ("mode", lambda r: r["args"]["mode"]),
+                       ("cycles", lambda r: r["args"]["cycles"]),
+                       ("passed", lambda r: not r["failures"])]:
+        print(f"{label:16s}" + "".join(f"{str(get(r)):>24s}" for r in runs))
+    for k in keys:
+        vals = [r["samples"][-1].get(k) if r["samples"] else None for r in runs]
+        if all(v is None for v in vals):
+            continue
+        print(f"{k:16s}" + "".join(f"{'-' if v is None else f'{v:.3f}':>24s}" for v in vals))
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--gui", action="store_true", help="drive PowerSupplyGUI instead of the bare communicator")
+    ap.add_argument("--cycles", type=int, default=1_000_000, help="FS frames to run")
+    ap.add_argument("--devices", type=int, default=1, help="emulated supplies (headless mode)")
+    ap.add_argument("--switch-every", type=int, default=50, help="cycles between switch commands")
+    ap.add_argument("--sample-every", type=int, default=20_000, help="cycles between samples")
+    ap.add_argument("--speedup", type=float, default=1000.0, help="divide gui after() delays by this (gui mode)")
+    ap.add_argument("--line-delay-ms", type=float, default=0.0,
+                    help="emulated per-line reply delay; ~18 ms gives the real ~200 ms FS frame")
+    ap.add_argument("--stall-timeout-s", type=float, default=30.0,
+                    help="gui mode: fail when no FS frame arrives for this long")
+    ap.add_argument("--top", type=int, default=5, help="tracemalloc allocators kept per sample")
+    ap.add_argument("--warmup", type=float, default=0.2, help="fraction of samples ignored by the trend fit")
+    ap.add_argument("--max-rss-growth-mb", type=float, default=20.0)
+    ap.add_argument("--max-traced-growth-mb", type=float, default=5.0)
+    ap.add_argument("--max-pending-after-growth", type=float, default=10.0)
+    ap.add_argument("--max-log-growth-chars", type=float, default=1_000_000)
+    ap.add_argument("--max-latency-drift", type=float, default=0.25, help="relative p50/p95 increase")
+    ap.add_argument("--latency-noise-sigmas", type=float, default=3.0,
+                    help="latency drift must exceed this many residual std devs of the fit")
+    ap.add_argument("--out-dir", default=os.path.join(ROOT, "soak_results"))
+    ap.add_argument("--compare", nargs="+", metavar="RESULT_JSON", help="compare stored runs and exit")
+    args = ap.parse_args()
+
+    if args.compare:
+        compare(args.compare)
+        return 0
+
+    args.mode = "gui" if args.gui else "headless"
+    tracemalloc.start(1)
+    sampler = Sampler(args.top)
+    started = time.strftime("%Y%m%d-%H%M%S")
+    try:
+        harness_failures = (run_gui if args.gui else run_headless)(args, sampler)
+    finally:
+        tracemalloc.stop()
+
+    failures = harness_failures + verdict(sampler.samples, args)
+    os.makedirs(args.out_dir, exist_ok=True)
+    out = os.path.join(args.out_dir, f"soak-{args.mode}-{started}.json")
+    with open(out, "w") as fh:
+        json.dump({
+            "git_rev": git_rev(),
+            "started": started,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "args": vars(args),
+            "samples": sampler.samples,
+            "failures": failures,
+        }, fh, indent=1)
+    print(f"results: {out}")
+    for f in failures:
+        print(f"FAIL: {f}")
+    print("PASS" if not failures else f"{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
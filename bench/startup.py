@@ -0,0 +1,97 @@
+# bench/startup.py
+"""
+measure time-to-first-frame of the gui.
+
+each sample launches the app with PSU_STARTUP_PROBE pointing at a temp file;
+main.py writes that file once the window is mapped and then closes itself.
+the parent times launch -> marker file.
+
+targets:
+- default: `python main.py`, i.e. the real entry point with its lazy imports
+- --exe PATH: a built executable, e.g. dist/main/main.exe from main.spec
+
+modes (python target):
+- cold: bytecode cache redirected to an empty temp dir, so every import compiles
+- warm: normal runs after the cache has been populated
+
+for --exe the first launch is reported as "first" and the rest as "warm";
+true cold (nothing in the os file cache) needs a reboot between runs.
+
+usage:
+  python bench/startup.py [--runs N]
+  python bench/startup.py --exe dist/main/main.exe [--runs N]
+"""
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def time_to_first_frame(cmd: list[str], env: dict, timeout_s: float = 60.0) -> float:
+    """
+    launch one child and return ms until it reports its first frame.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        marker = os.path.join(tmp, "first_frame")
+        err_path = os.path.join(tmp, "stderr")
+        env = dict(env, PSU_STARTUP_PROBE=marker)
+        # stderr goes to a file: an unread pipe could fill up and stall the child
+        with open(err_path, "w") as err_file:
+            t0 = time.perf_counter()
+            proc = subprocess.Popen(cmd, cwd=ROOT, env=env,
+                                    stdout=subprocess.DEVNULL, stderr=err_file)
+            dt = None
+            while time.perf_counter() - t0 < timeout_s:
+                if os.path.exists(marker):
+                    dt = (time.perf_counter() - t0) * 1000
+                    break
+                if proc.poll() is not None:
+                    break
+                time.sleep(0.001)
+            if dt is None:
+                proc.kill()
+            proc.wait()
+        if dt is None:
+            with open(err_path) as fh:
+                raise RuntimeError(f"{cmd[0]} never drew a frame:\n{fh.read()}")
+        return dt
+
+def summarize(label: str, samples: list[float]) -> None:
+    print(f"{label:5s} n={len(samples):3d}  "
+          f"median={statistics.median(samples):7.1f} ms  "
+          f"min={min(samples):7.1f} ms  max={max(samples):7.1f} ms")
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=5, help="samples per mode")
+    ap.add_argument("--exe", metavar="PATH", help="time this executable instead of `python main.py`")
+    args = ap.parse_args()
+
+    if args.exe:
+        cmd = [os.path.abspath(args.exe)]
+        env = dict(os.environ)
+        summarize("first", [time_to_first_frame(cmd, env)])
+        summarize("warm", [time_to_first_frame(cmd, env) for _ in range(args.runs)])
+        return
+
+    cmd = [sys.executable, os.path.join(ROOT, "main.py")]
+    cold: list[float] = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as cache:
+            env = dict(os.environ, PYTHONPYCACHEPREFIX=cache)
+            cold.append(time_to_first_frame(cmd, env))
+
+    env = dict(os.environ)
+    time_to_first_frame(cmd, env)  # prime the bytecode cache
+    warm = [time_to_first_frame(cmd, env) for _ in range(args.runs)]
+
+    summarize("cold", cold)
+    summarize("warm", warm)
+
+if __name__ == "__main__":
+    main()
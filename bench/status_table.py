@@ -0,0 +1,68 @@
+# bench/status_table.py
+"""
+time StatusTable renders for many devices updating at a fixed rate.
+
+every tick each device gets a new status dict in which a few fields changed,
+then tk is pumped; the cost of the idle-time render is recorded per tick.
+needs a display.
+
+usage: python bench/status_table.py [--devices 50] [--fields 30] [--ticks 200]
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--devices", type=int, default=50)
+    ap.add_argument("--fields", type=int, default=30)
+    ap.add_argument("--ticks", type=int, default=200)
+    ap.add_argument("--changed", type=int, default=5, help="fields that change per device per tick")
+    ap.add_argument("--hz", type=float, default=10.0)
+    args = ap.parse_args()
+
+    import customtkinter as ctk
+    from src.cgui import StatusTable, apply_theme
+
+    apply_theme()
+    root = ctk.CTk()
+    root.geometry("900x400")
+    table = StatusTable(root)
+    table.pack(fill="both", expand=True)
+
+    rng = random.Random(0)
+    keys = [f"FIELD{j:02d}" for j in range(args.fields)]
+    status = {f"COM{i}": {k: rng.randint(0, 100) for k in keys} for i in range(args.devices)}
+    for dev, st in status.items():
+        table.update_device(dev, dict(st))
+    root.update()
+
+    times: list[float] = []
+    period = 1.0 / args.hz
+    for _ in range(args.ticks):
+        tick_start = time.perf_counter()
+        for dev, st in status.items():
+            for k in rng.sample(keys, args.changed):
+                st[k] = round(rng.uniform(0, 100), 2)
+            table.update_device(dev, dict(st))
+        t0 = time.perf_counter()
+        root.update_idletasks()  # runs the coalesced render (and any redraws it caused)
+        times.append((time.perf_counter() - t0) * 1000)
+        root.update()
+        time.sleep(max(0.0, period - (time.perf_counter() - tick_start)))
+
+    times.sort()
+    print(f"{args.devices} devices x {args.fields} fields @ {args.hz:g} Hz, {args.ticks} ticks")
+    print(f"render ms: median={statistics.median(times):.2f}  "
+          f"p95={times[int(0.95 * (len(times) - 1))]:.2f}  max={times[-1]:.2f}")
+    root.destroy()
+
+if __name__ == "__main__":
+    main()
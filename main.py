@@ -1,5 +1,6 @@
 # main.py
-from src.cgui import PowerSupplyGUI
+import argparse
+import os
 
 # TARGET_SERIAL = "1234"
 
@@ -9,9 +10,44 @@ from src.cgui import PowerSupplyGUI
 #     # app = PowerSupplyGUI(port=None)
 #     app.mainloop()
 
+def parse_args(argv=None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="power supply controller")
+    ap.add_argument("--shm", default=os.environ.get("PSU_SHM_NAME"), metavar="NAME",
+                    help="publish status frames to this shared-memory segment (env: PSU_SHM_NAME)")
+    ap.add_argument("--export-dir", default=os.environ.get("PSU_EXPORT_DIR"), metavar="DIR",
+                    help="stream status frames and commands to files in DIR (env: PSU_EXPORT_DIR)")
+    ap.add_argument("--export-format", choices=["csv", "parquet"],
+                    default=os.environ.get("PSU_EXPORT_FORMAT", "csv"),
+                    help="export file format; parquet needs pyarrow (env: PSU_EXPORT_FORMAT)")
+    return ap.parse_args(argv)
+
 def main() -> None:
-    app = PowerSupplyGUI()
+    args = parse_args()
+    # imported here so `python -c "import main"` / headless tools don't pull in tk
+    from src.cgui import PowerSupplyGUI
+
+    app = PowerSupplyGUI(shm_name=args.shm, export_dir=args.export_dir,
+                         export_format=args.export_format)
+    probe = os.environ.get("PSU_STARTUP_PROBE")
+    if probe:
+        _report_first_frame(app, probe)
     app.mainloop()
 
+def _report_first_frame(app, path: str) -> None:
+    """
+    startup benchmark hook (bench/startup.py): once the window is on screen,
+    write a marker file and close. works for the frozen, windowed exe too,
+    where there is no stdout to print to.
+    """
+    def check():
+        if not app.winfo_ismapped():
+            app.after(1, check)
+            return
+        app.update_idletasks()
+        with open(path, "w") as fh:
+            fh.write("first frame\n")
+        app.on_close()
+    app.after(1, check)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
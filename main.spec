@@ -10,23 +10,27 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # legacy tk gui is never imported by main.py; keep it out of the bundle
+    excludes=['src.gui'],
     noarchive=False,
     optimize=0,
 )
 pyz = PYZ(a.pure)
 
+# onedir build: a onefile exe unpacks python, tcl/tk and the customtkinter assets
+# to a temp dir on every launch, which dominated cold start. binaries and data
+# now live next to main.exe in dist/main/ and are loaded in place.
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='main',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    # upx-packed dlls have to be unpacked on every launch, which costs more cold start than it saves on disk
+    upx=False,
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,
@@ -36,3 +40,12 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='main',
+)
@@ -3,26 +3,288 @@ from __future__ import annotations
 import customtkinter as ctk
 from tkinter import messagebox
 import tkinter as tk
-from src.serial_comm import PowerSupplyCommunicator, list_available_ports, find_com_port_by_sn
+import tkinter.font as tkfont
+from src.serial_comm import PowerSupplyCommunicator, list_available_ports, find_com_port_by_sn, COMMANDS, command_for
+import threading
 import time
 
-ctk.set_appearance_mode("System")  # options: "system", "dark", "light"
-ctk.set_default_color_theme("blue")  # you can change this to "green", "dark-blue", etc.
+_theme_applied = False
 
-COMMANDS: Dict[str, tuple[str, str]] = {
-    "fan": ("C1", "C0"),
-    "shutter": ("S1", "S0"),
-    "lamp": ("L1", "L0"),
-}
+def apply_theme() -> None:
+    """
+    set customtkinter appearance once, right before the first window is built
+    (kept out of module import so headless tools importing this module stay cheap).
+    """
+    global _theme_applied
+    if _theme_applied:
+        return
+    ctk.set_appearance_mode("System")  # options: "system", "dark", "light"
+    ctk.set_default_color_theme("blue")  # you can change this to "green", "dark-blue", etc.
+    _theme_applied = True
+
+def _format_cell(value) -> str:
+    """
+    short text for a status value; floats drop trailing zeros.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return str(value)
 
-def command_for(name: str, state_on: bool) -> str:
+class StatusTable(ctk.CTkFrame):
     """
-    map a boolean state to the proper device command string.
+    devices (rows) x status fields (columns) grid.
+
+    only the rows and columns that fit in the frame are backed by widgets; scrolling
+    points those widgets at other data instead of creating new ones. updates are
+    coalesced into one idle-time render, which only reconfigures cells whose text
+    changed and only looks at rows whose device got new data.
     """
-    if name not in COMMANDS:
-        raise KeyError(f"unknown command group '{name}'")
-    on_cmd, off_cmd = COMMANDS[name]
-    return on_cmd if state_on else off_cmd
+    COL_CHARS = 10       # cell width in characters
+    HEAD_CHARS = 12      # device column width in characters
+
+    def __init__(self, master, **kwargs) -> None:
+        super().__init__(master, **kwargs)
+
+        # data
+        self._devices: list[str] = []
+        self._data: dict[str, dict] = {}
+        self._fields: list[str] = []
+        self._field_set: set[str] = set()
+
+        # viewport (first visible row/column, and how many fit)
+        self._top = 0
+        self._left = 0
+        self._n_rows = 0
+        self._n_cols = 0
+
+        # widget pool and the text each widget currently shows
+        self._corner: tk.Label | None = None
+        self._col_heads: list[tk.Label] = []
+        self._row_heads: list[tk.Label] = []
+        self._cells: list[list[tk.Label]] = []
+        self._shown_cols: list[str | None] = []
+        self._shown_rows: list[str | None] = []
+        self._shown: list[list[str | None]] = []
+
+        # render bookkeeping
+        self._render_pending = False
+        self._full_render = True
+        self._dirty: set[str] = set()
+
+        font = tkfont.nametofont("TkDefaultFont")
+        self._font = font
+        self._row_px = font.metrics("linespace") + 4
+        self._col_px = font.measure("0") * self.COL_CHARS + 6
+        self._head_px = font.measure("0") * self.HEAD_CHARS + 6
+
+        # the pool is sized from the body, so the body must not size itself from the pool
+        self.grid_propagate(False)
+        self._body = tk.Frame(self, highlightthickness=0, bd=0)
+        self._body.grid_propagate(False)
+        self._body.grid(row=0, column=0, sticky="nsew", padx=(6, 0), pady=(6, 0))
+        self._vbar = ctk.CTkScrollbar(self, orientation="vertical", command=self._on_vscroll)
+        self._vbar.grid(row=0, column=1, sticky="ns", pady=(6, 0))
+        self._hbar = ctk.CTkScrollbar(self, orientation="horizontal", command=self._on_hscroll)
+        self._hbar.grid(row=1, column=0, sticky="ew", padx=(6, 0))
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self._body.bind("<Configure>", self._on_resize)
+        self._bind_wheel(self._body)
+
+    # ===== public api =====
+
+    def update_device(self, device: str, status: dict) -> None:
+        """
+        store the latest status for a device and schedule a render.
+        cheap enough to call for every frame from every device.
+        """
+        if device not in self._data:
+            self._devices.append(device)
+            self._full_render = True
+        self._data[device] = status
+        for k in status:
+            if k not in self._field_set:
+                self._field_set.add(k)
+                self._fields.append(k)
+                self._full_render = True
+        self._dirty.add(device)
+        self._schedule_render()
+
+    def remove_device(self, device: str) -> None:
+        if device not in self._data:
+            return
+        del self._data[device]
+        self._devices.remove(device)
+        self._top = max(0, min(self._top, len(self._devices) - self._n_rows))
+        self._full_render = True
+        self._schedule_render()
+
+    # ===== rendering =====
+
+    def _set_appearance_mode(self, mode_string) -> None:
+        # plain tk labels don't follow ctk's light/dark switch on their own
+        super()._set_appearance_mode(mode_string)
+        if getattr(self, "_n_rows", 0):
+            self._build_pool()
+            self._schedule_render()
+
+    def _schedule_render(self) -> None:
+        # after_idle runs once the event queue is drained, so input is handled first
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def _colors(self) -> tuple[str, str, str]:
+        """
+        (background, text, header background) for the current appearance mode.
+        """
+        theme = ctk.ThemeManager.theme
+        bg = self._apply_appearance_mode(theme["CTkFrame"]["fg_color"])
+        fg = self._apply_appearance_mode(theme["CTkLabel"]["text_color"])
+        head = self._apply_appearance_mode(theme["CTkFrame"]["top_fg_color"])
+        return bg, fg, head
+
+    def _make_label(self, row: int, column: int, chars: int, header: bool) -> tk.Label:
+        bg, fg, head = self._colors()
+        lbl = tk.Label(self._body, text="", width=chars, anchor="w", padx=3, pady=0, bd=0,
+                       font=self._font, bg=head if header else bg, fg=fg)
+        lbl.grid(row=row, column=column, sticky="nsew")
+        self._bind_wheel(lbl)
+        return lbl
+
+    def _build_pool(self) -> None:
+        """
+        (re)create just enough labels to fill the visible area.
+        only called when the frame is resized, never for data changes.
+        """
+        for w in self._body.winfo_children():
+            w.destroy()
+        bg, _fg, _head = self._colors()
+        self._body.configure(bg=bg)
+
+        self._corner = self._make_label(0, 0, self.HEAD_CHARS, header=True)
+        self._corner.configure(text="device")
+        self._col_heads = [self._make_label(0, j + 1, self.COL_CHARS, header=True) for j in range(self._n_cols)]
+        self._row_heads = []
+        self._cells = []
+        for i in range(self._n_rows):
+            self._row_heads.append(self._make_label(i + 1, 0, self.HEAD_CHARS, header=True))
+            self._cells.append([self._make_label(i + 1, j + 1, self.COL_CHARS, header=False)
+                                for j in range(self._n_cols)])
+        for i in range(self._n_rows + 1):
+            self._body.grid_rowconfigure(i, minsize=self._row_px)
+
+        # None never equals a string, so the next render fills every label
+        self._shown_cols = [None] * self._n_cols
+        self._shown_rows = [None] * self._n_rows
+        self._shown = [[None] * self._n_cols for _ in range(self._n_rows)]
+        self._full_render = True
+
+    def _render(self) -> None:
+        self._render_pending = False
+        full = self._full_render
+        dirty = self._dirty
+        self._full_render = False
+        self._dirty = set()
+
+        fields = self._fields
+        n_fields = len(fields)
+        devices = self._devices
+
+        if full:
+            for j in range(self._n_cols):
+                c = self._left + j
+                text = fields[c] if c < n_fields else ""
+                if self._shown_cols[j] != text:
+                    self._shown_cols[j] = text
+                    self._col_heads[j].configure(text=text)
+
+        for i in range(self._n_rows):
+            r = self._top + i
+            device = devices[r] if r < len(devices) else None
+            if not full and device not in dirty:
+                continue
+            name = device or ""
+            if self._shown_rows[i] != name:
+                self._shown_rows[i] = name
+                self._row_heads[i].configure(text=name)
+            status = self._data.get(device, {}) if device is not None else {}
+            shown = self._shown[i]
+            cells = self._cells[i]
+            for j in range(self._n_cols):
+                c = self._left + j
+                text = _format_cell(status.get(fields[c])) if c < n_fields else ""
+                if shown[j] != text:
+                    shown[j] = text
+                    cells[j].configure(text=text)
+
+        if full:
+            self._update_scrollbars()
+
+    def _update_scrollbars(self) -> None:
+        n_dev = len(self._devices)
+        if n_dev:
+            self._vbar.set(self._top / n_dev, min(1.0, (self._top + self._n_rows) / n_dev))
+        else:
+            self._vbar.set(0.0, 1.0)
+        n_fields = len(self._fields)
+        if n_fields:
+            self._hbar.set(self._left / n_fields, min(1.0, (self._left + self._n_cols) / n_fields))
+        else:
+            self._hbar.set(0.0, 1.0)
+
+    # ===== viewport =====
+
+    def _on_resize(self, event) -> None:
+        n_rows = max(1, (event.height - self._row_px) // self._row_px)
+        n_cols = max(1, (event.width - self._head_px) // self._col_px)
+        if (n_rows, n_cols) == (self._n_rows, self._n_cols):
+            return
+        self._n_rows, self._n_cols = n_rows, n_cols
+        self._build_pool()
+        self._scroll_to(self._top, self._left)
+
+    def _scroll_to(self, top: int, left: int) -> None:
+        top = max(0, min(top, len(self._devices) - self._n_rows))
+        left = max(0, min(left, len(self._fields) - self._n_cols))
+        if (top, left) != (self._top, self._left) or self._full_render:
+            self._top, self._left = top, left
+            self._full_render = True
+            self._schedule_render()
+
+    def _scrollbar_target(self, args: tuple, current: int, total: int, page: int) -> int:
+        # tk scroll commands: ("moveto", fraction) or ("scroll", n, "units" | "pages")
+        if args and args[0] == "moveto":
+            return round(float(args[1]) * total)
+        if args and args[0] == "scroll":
+            step = page if len(args) > 2 and args[2] == "pages" else 1
+            return current + int(args[1]) * step
+        return current
+
+    def _on_vscroll(self, *args) -> None:
+        self._scroll_to(self._scrollbar_target(args, self._top, len(self._devices), self._n_rows), self._left)
+
+    def _on_hscroll(self, *args) -> None:
+        self._scroll_to(self._top, self._scrollbar_target(args, self._left, len(self._fields), self._n_cols))
+
+    def _bind_wheel(self, widget) -> None:
+        widget.bind("<MouseWheel>", self._on_wheel)
+        widget.bind("<Shift-MouseWheel>", lambda e: self._on_wheel(e, horizontal=True))
+        # x11 reports the wheel as buttons 4/5
+        widget.bind("<Button-4>", lambda e: self._on_wheel(e, delta=-1))
+        widget.bind("<Button-5>", lambda e: self._on_wheel(e, delta=1))
+
+    def _on_wheel(self, event, horizontal: bool = False, delta: int | None = None) -> None:
+        if delta is None:
+            # windows sends multiples of 120, macos small signed steps
+            delta = -1 if event.delta > 0 else 1
+        if horizontal:
+            self._scroll_to(self._top, self._left + delta)
+        else:
+            self._scroll_to(self._top + delta * 3, self._left)
 
 class PowerSupplyGUI(ctk.CTk):
     """
@@ -66,12 +328,20 @@ class PowerSupplyGUI(ctk.CTk):
         except Exception:
             pass
 
-    def __init__(self) -> None:
+    def __init__(self, shm_name: str | None = None, export_dir: str | None = None,
+                 export_format: str = "csv") -> None:
+        """
+        shm_name: when set, every parsed status frame is also published to the
+        shared-memory segment of that name (see src/status_shm.py).
+        export_dir: when set, status frames and sent commands are streamed to
+        rotating csv/parquet files there (see src/telemetry_export.py).
+        """
+        apply_theme()
         super().__init__()
 
         # basic window setup
         self.title("power supply controller")
-        self.geometry("720x460")
+        self.geometry("720x640")
         # optional: set default theme / appearance
         # ctk.set_appearance_mode("system")  # or "light" / "dark"
         # ctk.set_default_color_theme("blue")  # "blue", "green", "dark-blue"
@@ -178,6 +448,10 @@ class PowerSupplyGUI(ctk.CTk):
         self.status_btn.pack(side="left", padx=6)
 
 
+        # ===== status table (one row per device) =====
+        self.status_table = StatusTable(self, height=180)
+        self.status_table.pack(fill="x", padx=12, pady=(8, 0))
+
         # ===== output log =====
         out_frame = ctk.CTkFrame(self)
         out_frame.pack(fill="both", expand=True, padx=12, pady=10)
@@ -185,14 +459,54 @@ class PowerSupplyGUI(ctk.CTk):
         self.output = ctk.CTkTextbox(out_frame, wrap="word")
         self.output.pack(fill="both", expand=True, padx=8, pady=8)
 
-        # initialize available ports
-        self.refresh_ports()
+        # enumerate ports in the background so the first frame isn't held up
+        self._port_scan_result: tuple[list[str] | None, Exception | None] | None = None
+        # after() id of the pending result poll; set from scan start until the result is applied
+        self._port_poll: str | None = None
+        self.after_idle(self.refresh_ports)
+
+        # optional local consumers
+        self.publisher = None
+        if shm_name:
+            self._start_publisher(shm_name)
+        self.exporter = None
+        if export_dir:
+            self._start_exporter(export_dir, export_format)
 
         # graceful close
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
     # ===== ui helpers =====
 
+    def _start_publisher(self, name: str) -> None:
+        """
+        publish status frames to shared memory; failure only disables publishing.
+        """
+        # imported lazily: only needed when publishing is turned on
+        from src.status_shm import StatusPublisher
+        try:
+            self.publisher = StatusPublisher(name)
+        except Exception as e:
+            self.log(f"shared memory '{name}' unavailable: {e}")
+            return
+        self.psu.publisher = self.publisher
+        self.psu.publish_slot = 0
+        self.log(f"publishing status to shared memory '{name}'")
+
+    def _start_exporter(self, directory: str, fmt: str) -> None:
+        """
+        stream telemetry to files; failure only disables the export.
+        """
+        # imported lazily: only needed when export is turned on
+        from src.telemetry_export import TelemetryExporter
+        try:
+            self.exporter = TelemetryExporter(directory, fmt=fmt)
+        except Exception as e:
+            self.log(f"telemetry export to '{directory}' unavailable: {e}")
+            return
+        self.psu.exporter = self.exporter
+        self.log(f"exporting telemetry ({fmt}) to '{directory}'")
+
     def start_auto_query(self) -> None:
         # start periodic queries once every second
         self._auto_query_running = True
@@ -212,9 +526,11 @@ class PowerSupplyGUI(ctk.CTk):
             t0 = time.monotonic()
             data = self.psu.query_status()
             dt = (time.monotonic() - t0) * 1000
-            self.log(f"FS reply in {dt:.1f} ms: {data}")
+            # the frame itself goes to the status table; the log only keeps timing
+            self.log(f"FS reply in {dt:.1f} ms ({len(data)} fields)")
             if data:
                 self._apply_status_to_switches(data)
+                self.status_table.update_device(self._device_label(), data)
         except Exception as e:
             messagebox.showerror("auto query error", str(e))
             self._auto_query_running = False
@@ -222,6 +538,20 @@ class PowerSupplyGUI(ctk.CTk):
         self.after(1000, self._auto_query_loop)
 
 
+    def _device_label(self) -> str:
+        """
+        row name for the connected device in the status table.
+        """
+        return self.psu.port or self.port_var.get() or "device"
+
+    def _drop_status_row(self) -> None:
+        """
+        remove the connected device's row before its port closes, so the table
+        never shows a closed port's last values as if they were current.
+        """
+        if self.psu.port:
+            self.status_table.remove_device(self.psu.port)
+
     def log(self, text: str) -> None:
         """
         append text to the output box.
@@ -249,14 +579,37 @@ class PowerSupplyGUI(ctk.CTk):
     def refresh_ports(self) -> None:
         """
         populate the port dropdown using serial_comm.list_available_ports.
+        enumeration runs on a worker thread; the result is picked up on the ui thread.
         """
-        try:
-            ports = list_available_ports()
-        except Exception as e:
+        if self._port_poll is not None:
+            # a scan is running or its result hasn't been applied yet
+            return
+
+        def worker():
+            try:
+                self._port_scan_result = (list_available_ports(), None)
+            except Exception as e:
+                self._port_scan_result = (None, e)
+
+        self._port_scan_result = None
+        threading.Thread(target=worker, name="port-scan", daemon=True).start()
+        self._port_poll = self.after(30, self._finish_port_scan)
+
+    def _finish_port_scan(self) -> None:
+        """
+        poll for the worker's result; tk widgets are only touched from here.
+        """
+        result = self._port_scan_result
+        if result is None:
+            self._port_poll = self.after(30, self._finish_port_scan)
+            return
+        self._port_poll = None
+        ports, err = result
+        if err is not None:
             self._set_port_values([])
-            messagebox.showerror("ports error", str(e))
+            messagebox.showerror("ports error", str(err))
             return
-        self._set_port_values(ports)
+        self._set_port_values(ports or [])
 
     def connect_to_selected(self) -> None:
         """
@@ -267,6 +620,7 @@ class PowerSupplyGUI(ctk.CTk):
             messagebox.showwarning("connect", "please refresh and pick a port first")
             return
         try:
+            self._drop_status_row()
             self.psu.connect(port)
             self.log(f"connected to {port}")
             # start auto-query by default
@@ -301,6 +655,7 @@ class PowerSupplyGUI(ctk.CTk):
                 return
 
             # connect and reflect in ui
+            self._drop_status_row()
             self.psu.connect(port)
             self.port_var.set(port)
             self.log(f"auto connect: connected to {port}")
@@ -320,6 +675,7 @@ class PowerSupplyGUI(ctk.CTk):
         disconnect button handler.
         """
         try:
+            self._drop_status_row()
             self.psu.disconnect()
             self.log("disconnected")
         except Exception as e:
@@ -466,8 +822,9 @@ class PowerSupplyGUI(ctk.CTk):
         try:
             data = self.psu.query_status()
             # self.log("> FS")
-            for k, v in data.items():
-                self.log(f"{k}: {v}")
+            # full field list goes to the status table; the log keeps one line per reply
+            self.log(f"status: {len(data)} fields")
+            self.status_table.update_device(self._device_label(), data)
             # reflect device state on switches
             self._apply_status_to_switches(data)
         except Exception as e:
@@ -478,7 +835,26 @@ class PowerSupplyGUI(ctk.CTk):
         """
         clean shutdown on window close.
         """
+        if self._port_poll is not None:
+            self.after_cancel(self._port_poll)
+            self._port_poll = None
         try:
+            self._drop_status_row()
             self.psu.disconnect()
         finally:
+            if self.publisher is not None:
+                self.psu.publisher = None
+                try:
+                    self.publisher.close()
+                except Exception:
+                    pass
+                self.publisher = None
+            if self.exporter is not None:
+                self.psu.exporter = None
+                try:
+                    # writes the last row group; reports rows lost during the session
+                    self.exporter.close()
+                except Exception as e:
+                    messagebox.showerror("telemetry export", str(e))
+                self.exporter = None
             self.destroy()
\ No newline at end of file
@@ -0,0 +1,88 @@
+# src/emulated_device.py
+"""
+in-memory stand-in for the power supply's serial port.
+
+implements the subset of serial.Serial that PowerSupplyCommunicator uses, and
+answers the same commands as the hardware (FS, C0/C1, S0/S1, L0/L1, P=nnnn).
+attach it with `psu._ser = EmulatedSupply(...)` instead of calling connect().
+"""
+from __future__ import annotations
+import random
+import time
+from collections import deque
+
+class EmulatedSupply:
+    def __init__(self, port: str = "EMU0", serial_number: str = "1234",
+                 line_delay_s: float = 0.0, seed: int | None = None) -> None:
+        self.port = port
+        self.serial_number = serial_number
+        # optional per-line delay to mimic the ~200 ms a real frame takes
+        self.line_delay_s = line_delay_s
+        self.timeout: float | None = 0.05
+        self.inter_byte_timeout: float | None = None
+        self.is_open = True
+
+        self.state = {"COOL": 0, "LAMP": 0, "SHUTTER": 0, "POWER": 0}
+        self.frames_sent = 0
+        self._rng = random.Random(seed)
+        self._pending: deque[bytes] = deque()
+        self._rx = b""
+
+    # ===== serial.Serial surface =====
+
+    def write(self, data: bytes) -> int:
+        self._rx += data
+        while b"\n" in self._rx:
+            line, self._rx = self._rx.split(b"\n", 1)
+            self._handle(line.decode("ascii", errors="ignore").strip())
+        return len(data)
+
+    def readline(self) -> bytes:
+        if not self._pending:
+            return b""
+        if self.line_delay_s > 0:
+            time.sleep(self.line_delay_s)
+        return self._pending.popleft()
+
+    def flush(self) -> None:
+        pass
+
+    def reset_input_buffer(self) -> None:
+        self._pending.clear()
+
+    def reset_output_buffer(self) -> None:
+        self._rx = b""
+
+    def close(self) -> None:
+        self.is_open = False
+
+    # ===== device behaviour =====
+
+    def _handle(self, cmd: str) -> None:
+        up = cmd.upper()
+        if up == "FS":
+            self._queue_status()
+        elif len(up) == 2 and up[0] in "CSL" and up[1] in "01":
+            key = {"C": "COOL", "S": "SHUTTER", "L": "LAMP"}[up[0]]
+            self.state[key] = int(up[1])
+        elif up.startswith("P=") and up[2:].isdigit():
+            self.state["POWER"] = min(int(up[2:]), 9999)
+
+    def _queue_status(self) -> None:
+        rng = self._rng
+        lamp_on = self.state["LAMP"]
+        lines = [
+            "START",
+            f"SERIAL NUMBER={self.serial_number}",
+            f"COOL={self.state['COOL']}",
+            f"LAMP={lamp_on}",
+            f"SHUTTER={self.state['SHUTTER']}",
+            f"POWER={self.state['POWER']}",
+            f"VOLTAGE={(20.0 + 2.0 * lamp_on + rng.uniform(-0.05, 0.05)):.2f}",
+            f"CURRENT={(self.state['POWER'] / 1000.0 * lamp_on + rng.uniform(0, 0.01)):.3f}",
+            f"TEMP={(30.0 + 10.0 * lamp_on + rng.uniform(-0.5, 0.5)):.1f}",
+            f"HOURS={self.frames_sent // 3600}",
+            "END",
+        ]
+        self._pending.extend((ln + "\r\n").encode("ascii") for ln in lines)
+        self.frames_sent += 1
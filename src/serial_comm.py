@@ -1,9 +1,28 @@
 # src/serial_comm.py
 from __future__ import annotations
-import serial
 import time
-from serial.tools import list_ports
-from typing import List, Optional, Tuple
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import serial
+
+# pyserial is imported lazily (inside connect / port listing) so headless tools
+# that only need _parse_status_block don't pay for it at import time
+
+COMMANDS: dict[str, tuple[str, str]] = {
+    "fan": ("C1", "C0"),
+    "shutter": ("S1", "S0"),
+    "lamp": ("L1", "L0"),
+}
+
+def command_for(name: str, state_on: bool) -> str:
+    """
+    map a boolean state to the proper device command string.
+    """
+    if name not in COMMANDS:
+        raise KeyError(f"unknown command group '{name}'")
+    on_cmd, off_cmd = COMMANDS[name]
+    return on_cmd if state_on else off_cmd
 
 def _parse_status_block(text: str) -> dict:
     """
@@ -51,7 +70,8 @@ def list_available_ports() -> List[str]:
     return a list of available serial port device names.
     """
     # all ui code should call this instead of accessing serial.tools.list_ports directly
-    return [p.device for p in serial.tools.list_ports.comports()]
+    from serial.tools import list_ports
+    return [p.device for p in list_ports.comports()]
 
 class PowerSupplyCommunicator:
     def __init__(self, baudrate=9600,  timeout: float = 0.05) -> None:
@@ -60,9 +80,23 @@ class PowerSupplyCommunicator:
         self.timeout = timeout
         self._ser : Optional[serial.Serial] = None
         self.last_status: dict | None = None
-
+        # optional src.status_shm.StatusPublisher; each parsed frame is mirrored into `publish_slot`
+        self.publisher = None
+        self.publish_slot = 0
+        # optional src.telemetry_export.TelemetryExporter; receives status frames and sent commands
+        self.exporter = None
+
+    @property
+    def port(self) -> str | None:
+        """
+        device name of the open port, or None when not connected.
+        """
+        if self._ser is None:
+            return None
+        return self._ser.port
 
     def connect(self, port: str) -> None:
+        import serial
         self.disconnect()
         self._ser = serial.Serial(port=port, baudrate=self.baudrate, timeout=self.timeout)
 
@@ -85,6 +119,8 @@ class PowerSupplyCommunicator:
         self._ser.reset_input_buffer()
         self._ser.write(payload)
         self._ser.flush()
+        if self.exporter is not None:
+            self.exporter.record_command(cmd, port=self.port or "")
         # optional short wait for device to generate a reply
         if wait_s > 0:
             time.sleep(wait_s)
@@ -150,6 +186,14 @@ class PowerSupplyCommunicator:
         raw_text = "".join(lines)
         parsed = _parse_status_block(raw_text)
         self.last_status = parsed
+        if self.publisher is not None and parsed:
+            try:
+                self.publisher.publish(self.publish_slot, parsed, label=self.port or "")
+            except Exception:
+                # local consumers are best-effort; never fail a device read because of them
+                pass
+        if self.exporter is not None and parsed:
+            self.exporter.record_status(parsed, port=self.port or "")
         return parsed
 
 def find_com_port_by_sn(target_serial, baudrate: int = 9600, timeout: float = 1.5) -> str | None:
@@ -157,6 +201,7 @@ def find_com_port_by_sn(target_serial, baudrate: int = 9600, timeout: float = 1.
     connect to each com port, call query_status() to read + parse once,
     and match 'SERIAL NUMBER' to target_serial. sends no commands here directly.
     """
+    from serial.tools import list_ports
     psu = PowerSupplyCommunicator(baudrate=baudrate, timeout=timeout)
 
     for p in list_ports.comports():
@@ -0,0 +1,282 @@
+# src/status_shm.py
+"""
+publish parsed status frames into a fixed-layout shared-memory segment so other
+local processes can read the latest status without touching the serial port.
+
+layout (little-endian, every block 64-byte aligned):
+- header: magic, layout version, slot count, fields per slot, slot size, owner pid
+- one slot per supply: seq counter, timestamp, field count, label, then fields
+- each field: key, kind (number/text), float value, text value
+
+each slot is guarded by a seqlock: the writer bumps `seq` to an odd value,
+writes the fields, then bumps it to the next even value. the frame is packed
+into a scratch buffer first, so the odd window is a single memcpy. readers copy
+the used part of the slot, re-check `seq` and only then decode, so they never
+block the writer or each other. a reader that can't get a clean copy before its
+deadline gets the last consistent snapshot it saw for that slot.
+
+there is one writer per segment. a publisher only takes over an existing
+segment of the same name when the pid recorded in its header is no longer
+running; a live owner makes the second publisher fail with FileExistsError.
+"""
+from __future__ import annotations
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import NamedTuple, Optional
+
+MAGIC = b"PSUSHM01"
+LAYOUT_VERSION = 2
+
+DEFAULT_SLOTS = 8
+DEFAULT_FIELDS = 32
+
+KEY_LEN = 24
+TEXT_LEN = 24
+LABEL_LEN = 32
+
+KIND_NUMBER = 0
+KIND_TEXT = 1
+
+_HEADER = struct.Struct("<8sIIIII")             # magic, version, n_slots, max_fields, slot_size, owner pid
+_SEQ = struct.Struct("<Q")
+_SLOT_HEAD = struct.Struct(f"<QdI4x{LABEL_LEN}s")  # seq, timestamp, n_fields, label
+_FIELD = struct.Struct(f"<{KEY_LEN}sB7xd{TEXT_LEN}s")  # key, kind, number, text
+
+HEADER_SIZE = 64
+SLOT_HEAD_SIZE = 64
+FIELD_SIZE = _FIELD.size  # 64
+
+class Snapshot(NamedTuple):
+    seq: int
+    timestamp: float
+    label: str
+    status: dict
+
+def _pid_alive(pid: int) -> bool:
+    """
+    whether a process with this pid is still running.
+    """
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        # os.kill(pid, 0) would terminate the process on windows; ask the kernel instead
+        import ctypes
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+        kernel32 = ctypes.windll.kernel32  # type: ignore[attr-defined]
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+        try:
+            code = ctypes.c_ulong()
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(code))) and code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _slot_size(max_fields: int) -> int:
+    return SLOT_HEAD_SIZE + max_fields * FIELD_SIZE
+
+def _encode(text: str, size: int) -> bytes:
+    return text.encode("utf-8", errors="replace")[:size]
+
+def _decode(raw: bytes) -> str:
+    return raw.rstrip(b"\x00").decode("utf-8", errors="replace")
+
+class StatusPublisher:
+    """
+    owns the shared-memory segment and writes frames into it.
+    only one process (the one holding the serial port) should publish.
+    """
+    def __init__(self, name: str, slots: int = DEFAULT_SLOTS, max_fields: int = DEFAULT_FIELDS) -> None:
+        self.name = name
+        self.slots = slots
+        self.max_fields = max_fields
+        self.slot_size = _slot_size(max_fields)
+        size = HEADER_SIZE + slots * self.slot_size
+        self._shm = self._create(name, size)
+        self._buf = self._shm.buf
+        # frames are packed here first; only the final copy happens under an odd seq
+        self._scratch = bytearray(self.slot_size)
+
+    def _create(self, name: str, size: int) -> shared_memory.SharedMemory:
+        """
+        create the segment, or take over one whose owner has exited.
+        a leftover with the same layout is reused in place so attached readers keep
+        working; anything else is unlinked and recreated. raises FileExistsError
+        while the recorded owner is still running.
+        """
+        pid = os.getpid()
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            shm = shared_memory.SharedMemory(name=name, create=False)
+            header = _HEADER.unpack_from(shm.buf, 0) if shm.size >= _HEADER.size else None
+            owner = header[5] if header is not None and header[0] == MAGIC else 0
+            if owner != pid and _pid_alive(owner):
+                shm.close()
+                raise FileExistsError(f"status segment '{name}' is already published by pid {owner}")
+            if header is not None and header[:5] == (MAGIC, LAYOUT_VERSION, self.slots, self.max_fields, self.slot_size):
+                # claim it; slots keep their last frames until we publish over them
+                _HEADER.pack_into(shm.buf, 0, MAGIC, LAYOUT_VERSION, self.slots,
+                                  self.max_fields, self.slot_size, pid)
+                return shm
+            shm.close()
+            shm.unlink()
+            # on windows unlink is a no-op: the name only goes away when every handle
+            # (readers included) is closed, so this raises until they let go
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        _HEADER.pack_into(shm.buf, 0, MAGIC, LAYOUT_VERSION, self.slots, self.max_fields, self.slot_size, pid)
+        return shm
+
+    def _offset(self, slot: int) -> int:
+        if not 0 <= slot < self.slots:
+            raise IndexError(f"slot {slot} out of range (0..{self.slots - 1})")
+        return HEADER_SIZE + slot * self.slot_size
+
+    def publish(self, slot: int, status: dict, label: str = "") -> None:
+        """
+        write one parsed status dict into a slot.
+        numbers go in as float64, everything else as truncated text;
+        fields beyond max_fields are dropped.
+        """
+        off = self._offset(slot)
+        buf = self._buf
+        scratch = self._scratch
+
+        items = list(status.items())[: self.max_fields]
+        pos = SLOT_HEAD_SIZE
+        for k, v in items:
+            key = _encode(str(k), KEY_LEN)
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                _FIELD.pack_into(scratch, pos, key, KIND_NUMBER, float(v), b"")
+            else:
+                _FIELD.pack_into(scratch, pos, key, KIND_TEXT, 0.0, _encode(str(v), TEXT_LEN))
+            pos += FIELD_SIZE
+        _SLOT_HEAD.pack_into(scratch, 0, 0, time.time(), len(items), _encode(label, LABEL_LEN))
+
+        seq = _SEQ.unpack_from(buf, off)[0]
+        if seq & 1:
+            # a previous writer died mid-frame; start from the next odd value
+            seq += 1
+        # odd: write in progress; copy everything after seq, then even seq publishes it
+        _SEQ.pack_into(buf, off, seq + 1)
+        buf[off + _SEQ.size:off + pos] = scratch[_SEQ.size:pos]
+        _SEQ.pack_into(buf, off, seq + 2)
+
+    def close(self) -> None:
+        """
+        release the mapping and remove the segment (only if we still own it).
+        """
+        owner = _HEADER.unpack_from(self._buf, 0)[5]
+        self._buf = None  # type: ignore[assignment]
+        try:
+            self._shm.close()
+        finally:
+            if owner == os.getpid():
+                try:
+                    self._shm.unlink()
+                except FileNotFoundError:
+                    pass
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    open an existing segment without letting this process's resource tracker
+    unlink it on exit (readers never own the segment).
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, create=False, track=False)  # python 3.13+
+    except TypeError:
+        pass
+    shm = shared_memory.SharedMemory(name=name, create=False)
+    if os.name == "posix":
+        from multiprocessing import resource_tracker
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+        except Exception:
+            pass
+    return shm
+
+class StatusReader:
+    """
+    read-only view of a segment created by StatusPublisher.
+    cheap to create; any number of readers can attach at once.
+    """
+    def __init__(self, name: str) -> None:
+        self._shm = _attach(name)
+        self._buf = self._shm.buf
+        magic, version, slots, max_fields, slot_size, _owner = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            self._shm.close()
+            raise ValueError(f"'{name}' is not a status segment (magic={magic!r}, version={version})")
+        self.slots = slots
+        self.max_fields = max_fields
+        self.slot_size = slot_size
+        # last consistent snapshot per slot, handed out when a read can't get a clean copy
+        self._last: list[Optional[Snapshot]] = [None] * slots
+
+    def read(self, slot: int, timeout_s: float = 0.001) -> Optional[Snapshot]:
+        """
+        return a consistent snapshot of one slot, or None if nothing was published yet.
+        if the writer (or a writer that died mid-frame) keeps the slot busy past
+        `timeout_s`, the last consistent snapshot this reader saw is returned instead;
+        compare its `seq` with seq(slot) to tell.
+        """
+        if not 0 <= slot < self.slots:
+            raise IndexError(f"slot {slot} out of range (0..{self.slots - 1})")
+        off = HEADER_SIZE + slot * self.slot_size
+        buf = self._buf
+        deadline = None
+        spins = 0
+        while True:
+            seq1 = _SEQ.unpack_from(buf, off)[0]
+            if seq1 == 0:
+                return None
+            if not seq1 & 1:
+                n = min(_SLOT_HEAD.unpack_from(buf, off)[2], self.max_fields)
+                raw = bytes(buf[off:off + SLOT_HEAD_SIZE + n * FIELD_SIZE])
+                if _SEQ.unpack_from(buf, off)[0] == seq1:
+                    snap = self._decode_slot(raw, n)
+                    self._last[slot] = snap
+                    return snap
+            # writer is mid-frame: spin briefly, then yield so it can finish
+            spins += 1
+            if deadline is None:
+                deadline = time.perf_counter() + timeout_s
+            elif time.perf_counter() >= deadline:
+                return self._last[slot]
+            if spins > 16:
+                time.sleep(0)
+
+    @staticmethod
+    def _decode_slot(raw: bytes, n: int) -> Snapshot:
+        seq, ts, _n, label = _SLOT_HEAD.unpack_from(raw, 0)
+        status: dict = {}
+        for key, kind, number, text in _FIELD.iter_unpack(raw[SLOT_HEAD_SIZE:SLOT_HEAD_SIZE + n * FIELD_SIZE]):
+            if kind == KIND_NUMBER:
+                status[_decode(key)] = int(number) if number.is_integer() else number
+            else:
+                status[_decode(key)] = _decode(text)
+        return Snapshot(seq, ts, _decode(label), status)
+
+    def seq(self, slot: int) -> int:
+        """
+        current sequence number of a slot; cheap way to poll for new frames.
+        """
+        return _SEQ.unpack_from(self._buf, HEADER_SIZE + slot * self.slot_size)[0]
+
+    def read_all(self) -> list[Optional[Snapshot]]:
+        return [self.read(i) for i in range(self.slots)]
+
+    def close(self) -> None:
+        self._buf = None  # type: ignore[assignment]
+        self._shm.close()
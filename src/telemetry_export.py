@@ -0,0 +1,322 @@
+# src/telemetry_export.py
+"""
+stream status frames and command events to tabular files.
+
+rows are collected into fixed-size row groups; full groups are handed to a
+background writer thread which appends them to the current file and flushes.
+at most `max_pending_groups` groups are held in memory; if the disk can't keep
+up, further groups are dropped and counted.
+
+when no group has arrived for `flush_interval_s`, csv output also writes the
+rows collected so far (csv has no row groups, so nothing fragments). parquet
+keeps a partial group until it fills up, its file is rotated by age, or the
+exporter is closed, so every row group but the last in a file is full size.
+
+columns: time, port, kind ('status' or 'command'), command, then one column
+per status key as reported by the device (see serial_comm._parse_status_block).
+the file rotates when it passes `max_bytes`, when it is older than `max_age_s`,
+when it holds `max_row_groups` groups, or when a status frame brings a key the
+current file has no column for.
+
+formats:
+- 'csv'     plain csv, stdlib only. rows are readable as soon as they are written.
+- 'parquet' one parquet row group per group; needs pyarrow (optional).
+            a parquet file has no footer until it is closed, so the file being
+            written can't be read and is lost if the process dies. parquet
+            therefore rotates often by default (every 5 minutes or 16 row groups):
+            finished files are complete, and a crash costs at most the open one.
+"""
+from __future__ import annotations
+import csv
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+BASE_COLUMNS = ["time", "port", "kind", "command"]
+
+# a row is (time, port, kind, command, status dict)
+Row = tuple
+
+def _row_values(row: Row, fields: list[str]) -> list:
+    ts, port, kind, command, status = row
+    return [ts, port, kind, command] + [status.get(k) for k in fields]
+
+class _CsvFile:
+    def __init__(self, path: str, fields: list[str]) -> None:
+        self.fields = fields
+        self.groups = 0
+        self._fh = open(path, "w", newline="", encoding="utf-8")
+        self._csv = csv.writer(self._fh)
+        self._csv.writerow(BASE_COLUMNS + fields)
+
+    def write_group(self, rows: list[Row]) -> None:
+        self._csv.writerows(
+            ["" if v is None else v for v in _row_values(r, self.fields)] for r in rows
+        )
+        self._fh.flush()
+        self.groups += 1
+
+    def size(self) -> int:
+        return self._fh.tell()
+
+    def close(self) -> None:
+        self._fh.close()
+
+class _ParquetFile:
+    def __init__(self, path: str, fields: list[str], sample: dict) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("parquet export needs pyarrow (pip install pyarrow)") from e
+        self._pa = pa
+        self.fields = fields
+        self.groups = 0
+        self._path = path
+        # numeric keys become float64 columns, everything else string
+        self._numeric = {
+            k: isinstance(sample.get(k), (int, float)) and not isinstance(sample.get(k), bool)
+            for k in fields
+        }
+        cols = [
+            pa.field("time", pa.float64()),
+            pa.field("port", pa.string()),
+            pa.field("kind", pa.string()),
+            pa.field("command", pa.string()),
+        ] + [pa.field(k, pa.float64() if self._numeric[k] else pa.string()) for k in fields]
+        self._schema = pa.schema(cols)
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def _coerce(self, key: str, v):
+        if v is None:
+            return None
+        if self._numeric[key]:
+            try:
+                return float(v)
+            except (TypeError, ValueError):
+                return None
+        return str(v)
+
+    def write_group(self, rows: list[Row]) -> None:
+        columns: list[list] = [[] for _ in range(len(BASE_COLUMNS) + len(self.fields))]
+        for ts, port, kind, command, status in rows:
+            columns[0].append(ts)
+            columns[1].append(port)
+            columns[2].append(kind)
+            columns[3].append(command)
+            for i, k in enumerate(self.fields, start=len(BASE_COLUMNS)):
+                columns[i].append(self._coerce(k, status.get(k)))
+        table = self._pa.Table.from_arrays(
+            [self._pa.array(c, type=f.type) for c, f in zip(columns, self._schema)],
+            schema=self._schema,
+        )
+        self._writer.write_table(table, row_group_size=len(rows))
+        self.groups += 1
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self._path)
+        except OSError:
+            return 0
+
+    def close(self) -> None:
+        self._writer.close()
+
+class TelemetryExporter:
+    """
+    collects rows on the caller's thread and writes them from a background thread.
+    record_* calls never touch the disk, so they are safe from the ui thread.
+    """
+    def __init__(self, directory: str, prefix: str = "telemetry", fmt: str = "csv",
+                 row_group_size: int = 256, flush_interval_s: float = 1.0,
+                 max_bytes: int = 64 * 1024 * 1024, max_age_s: float | None = None,
+                 max_row_groups: int | None = None, max_pending_groups: int = 64) -> None:
+        """
+        max_age_s / max_row_groups default to 3600 s / unlimited for csv and
+        300 s / 16 groups for parquet (see the module docstring).
+        """
+        if fmt not in ("csv", "parquet"):
+            raise ValueError(f"unknown export format '{fmt}'")
+        if fmt == "parquet":
+            # fail here, not later on the writer thread
+            import importlib.util
+            if importlib.util.find_spec("pyarrow") is None:
+                raise ImportError("parquet export needs pyarrow (pip install pyarrow)")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.fmt = fmt
+        self.row_group_size = row_group_size
+        self.flush_interval_s = flush_interval_s
+        self.max_bytes = max_bytes
+        if max_age_s is None:
+            max_age_s = 300.0 if fmt == "parquet" else 3600.0
+        self.max_age_s = max_age_s
+        if max_row_groups is None:
+            max_row_groups = 16 if fmt == "parquet" else 0
+        self.max_row_groups = max_row_groups  # 0 = no limit
+
+        self.files: list[str] = []  # every file written so far, oldest first
+        self.dropped_groups = 0
+        self.write_error: Exception | None = None
+
+        self._lock = threading.Lock()
+        self._group: list[Row] = []
+        self._queue: queue.Queue[list[Row] | None] = queue.Queue(maxsize=max_pending_groups)
+        self._file: _CsvFile | _ParquetFile | None = None
+        self._opened_at = 0.0
+        self._sample: dict = {}
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+        self._thread.start()
+
+    # ===== producer side =====
+
+    def record_status(self, status: dict, port: str = "", ts: Optional[float] = None) -> None:
+        self._append((time.time() if ts is None else ts, port, "status", "", status))
+
+    def record_command(self, command: str, port: str = "", ts: Optional[float] = None) -> None:
+        self._append((time.time() if ts is None else ts, port, "command", command, {}))
+
+    def _append(self, row: Row) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._group.append(row)
+            if len(self._group) < self.row_group_size:
+                return
+            group, self._group = self._group, []
+            # submitted under the lock so close() can't slip its sentinel in ahead of it
+            self._submit(group)
+
+    def _submit(self, group: list[Row]) -> None:
+        try:
+            self._queue.put_nowait(group)
+        except queue.Full:
+            self.dropped_groups += 1
+
+    def close(self) -> None:
+        """
+        hand the last rows to the writer, wait for it and close the current file.
+        raises RuntimeError if any rows were lost during the session.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            group, self._group = self._group, []
+        # blocking puts: at shutdown waiting for the writer beats dropping the tail
+        if group:
+            self._queue.put(group)
+        self._queue.put(None)
+        self._thread.join()
+
+        problems = []
+        if self.dropped_groups:
+            problems.append(f"{self.dropped_groups} row group(s) of up to {self.row_group_size} rows "
+                            f"dropped because the writer fell behind")
+        if self.write_error is not None:
+            problems.append(f"write failed: {self.write_error}")
+        if problems:
+            raise RuntimeError("telemetry export incomplete: " + "; ".join(problems)) from self.write_error
+
+    # ===== writer thread =====
+
+    def _run(self) -> None:
+        while True:
+            try:
+                group = self._queue.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                try:
+                    self._idle()
+                except Exception as e:
+                    self.write_error = e
+                continue
+            if group is None:
+                break
+            try:
+                self._write(group)
+            except Exception as e:
+                # keep draining so producers never back up; surface the error to the owner
+                self.write_error = e
+        try:
+            self._close_file()
+        except Exception as e:
+            self.write_error = e
+
+    def _idle(self) -> None:
+        """
+        nothing arrived for flush_interval_s: write out partial rows where that
+        doesn't hurt the file layout, and close a file that has outlived max_age_s.
+        """
+        aged = self._file is not None and time.monotonic() - self._opened_at >= self.max_age_s
+        if self.fmt != "csv" and not aged:
+            return
+        with self._lock:
+            group, self._group = self._group, []
+        if group:
+            if self._file is not None and not self._new_fields(group):
+                # straight into the current file, even if it is due for rotation
+                self._file.write_group(group)
+            else:
+                self._write(group)
+        if self._file is not None and time.monotonic() - self._opened_at >= self.max_age_s:
+            # the next group starts a new file
+            self._close_file()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            f, self._file = self._file, None
+            f.close()
+
+    def _new_fields(self, group: list[Row]) -> list[str]:
+        """
+        status keys in `group` that the current file has no column for, in arrival order.
+        """
+        known = set(self._file.fields) if self._file is not None else set()
+        new: list[str] = []
+        for r in group:
+            for k in r[4]:
+                if k not in known:
+                    known.add(k)
+                    new.append(k)
+        return new
+
+    def _needs_rotation(self, group: list[Row]) -> list[str] | None:
+        """
+        return the field list for a new file if one is needed, else None.
+        """
+        current = self._file.fields if self._file is not None else []
+        new = self._new_fields(group)
+        if self._file is None or new:
+            return current + new
+        if (self._file.size() >= self.max_bytes
+                or time.monotonic() - self._opened_at >= self.max_age_s
+                or (self.max_row_groups and self._file.groups >= self.max_row_groups)):
+            return current
+        return None
+
+    def _write(self, group: list[Row]) -> None:
+        fields = self._needs_rotation(group)
+        if fields is not None:
+            self._open(fields, group)
+        assert self._file is not None
+        self._file.write_group(group)
+
+    def _open(self, fields: list[str], group: list[Row]) -> None:
+        self._close_file()
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        ext = "parquet" if self.fmt == "parquet" else "csv"
+        path = os.path.join(self.directory, f"{self.prefix}-{stamp}-{len(self.files):04d}.{ext}")
+        if self.fmt == "parquet":
+            # column types follow the first value ever seen for a key, across rotations
+            for r in group:
+                for k, v in r[4].items():
+                    self._sample.setdefault(k, v)
+            self._file = _ParquetFile(path, fields, self._sample)
+        else:
+            self._file = _CsvFile(path, fields)
+        self._opened_at = time.monotonic()
+        self.files.append(path)